@@ -5,7 +5,7 @@ pydantic-settings で環境変数を一元管理する。
 既存の .env ファイルを拡張し、Stripe / SendGrid / App 設定を追加。
 """
 
-from functools import lru_cache
+from functools import cache
 from typing import Optional
 
 from pydantic_settings import BaseSettings
@@ -44,6 +44,7 @@ class Settings(BaseSettings):
 
     # --- App ---
     app_domain: str = "tamesuke.persys.jp"
+    thread_pool_size: int = 32
 
     model_config = {
         "env_file": ".env",
@@ -51,7 +52,7 @@ class Settings(BaseSettings):
     }
 
 
-@lru_cache()
+@cache
 def get_settings() -> Settings:
     """設定のシングルトンを返す（キャッシュ付き）"""
     return Settings()
@@ -4,13 +4,16 @@ Tamesuke バックエンド API
 FastAPI アプリケーションのエントリポイント。
 """
 
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from api.config import get_settings
@@ -25,9 +28,21 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """起動・終了時のログ出力"""
-    logger.info("Tamesuke API 起動")
+    """起動・終了時の処理
+
+    asyncio のデフォルト executor（def ルートとも共有される）を
+    専用サイズのスレッドプールに差し替える。provision は数分かかるため、
+    デフォルトの min(32, cpu+4) ではバースト時に枯渇しやすい。
+    """
+    pool_size = get_settings().thread_pool_size
+    executor = ThreadPoolExecutor(
+        max_workers=pool_size,
+        thread_name_prefix="tamesuke",
+    )
+    asyncio.get_running_loop().set_default_executor(executor)
+    logger.info("Tamesuke API 起動 (thread_pool_size=%d)", pool_size)
     yield
+    executor.shutdown(wait=False)
     logger.info("Tamesuke API 終了")
 
 
@@ -35,6 +50,7 @@ app = FastAPI(
     title="Tamesuke API",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
@@ -63,8 +79,19 @@ async def health() -> dict:
 
 
 # フロントエンド静的ファイル配信（APIルートより後にマウント）
+# ディレクトリはデプロイ時に固定のため、起動時の存在チェックと
+# シンボリックリンク解決は省略する
 _frontend_dir = Path(__file__).resolve().parent.parent / "frontend"
-app.mount("/", StaticFiles(directory=_frontend_dir, html=True), name="frontend")
+app.mount(
+    "/",
+    StaticFiles(
+        directory=str(_frontend_dir),
+        html=True,
+        check_dir=False,
+        follow_symlink=False,
+    ),
+    name="frontend",
+)
 
 
 if __name__ == "__main__":
@@ -4,14 +4,13 @@ Stripe Checkout Session 作成 API
 フォーム入力を受け取り、Stripe Checkout ページの URL を返す。
 """
 
-import asyncio
 import logging
-from typing import Literal
+from typing import Annotated, Literal
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, StringConstraints
 
-from api.routes.subdomain import _validate_subdomain, _check_dns
+from api.routes.subdomain import _validate_subdomain, _check_dns_cached
 from api.services import stripe_service
 
 logger = logging.getLogger(__name__)
@@ -20,7 +19,11 @@ router = APIRouter()
 
 class CheckoutRequest(BaseModel):
     """Checkout Session 作成リクエスト"""
-    email: EmailStr
+    # 構文チェックのみ（厳密な検証は Stripe / SendGrid 側で行われる）
+    email: Annotated[
+        str,
+        StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$", max_length=254),
+    ]
     company_name: str
     oss_type: Literal["nginx"]
     duration_days: Literal[7, 14]
@@ -44,8 +47,7 @@ async def create_checkout(body: CheckoutRequest) -> dict:
     _validate_subdomain(body.subdomain)
 
     # 2. サブドメイン重複チェック
-    loop = asyncio.get_event_loop()
-    available = await loop.run_in_executor(None, _check_dns, body.subdomain)
+    available = await _check_dns_cached(body.subdomain)
     if not available:
         raise HTTPException(
             status_code=409,
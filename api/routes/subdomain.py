@@ -1,14 +1,17 @@
 """
 サブドメイン重複チェック API
 
-Cloudflare DNS に既存の CNAME レコードがあるかどうかで判定する。
+Cloudflare の DNS-over-HTTPS（1.1.1.1）で FQDN が NXDOMAIN かどうかで
+判定する。管理 API と違い認証・スレッドプール不要。
 """
 
 import asyncio
 import logging
 import re
+import time
 
-from cloudflare import Cloudflare
+import httpx
+import orjson
 from fastapi import APIRouter, HTTPException, Query
 
 from api.config import get_settings
@@ -16,6 +19,33 @@ from api.config import get_settings
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 設定はインポート時に一度だけ解決する
+_settings = get_settings()
+
+# DNS-over-HTTPS 用の共有クライアント
+_doh_client = httpx.AsyncClient(
+    base_url="https://cloudflare-dns.com",
+    timeout=2.0,
+    headers={"accept": "application/dns-json"},
+)
+
+# DNS チェック結果の短期キャッシュ: subdomain → (取得時刻, 利用可否)
+# UI のチェック直後に checkout が同じ名前を再チェックするため、
+# 短い TTL でも往復を 1 回に減らせる
+# キーはクライアント入力のため、上限なしで成長しないようサイズを制限する
+_DNS_CACHE_TTL = 10.0
+_DNS_CACHE_MAX = 1024
+_dns_cache: dict[str, tuple[float, bool]] = {}
+
+# 実行中の DNS チェック: subdomain → Future
+# 同じ名前への同時リクエストを 1 回の上流呼び出しにまとめる（single-flight）
+_inflight: dict[str, asyncio.Future] = {}
+
+# 許可文字（英小文字・数字・ハイフン）。translate の削除集合として使い、
+# 1 回の C レベルスキャンで不正文字の有無を判定する
+_ALLOWED_BYTES = b"abcdefghijklmnopqrstuvwxyz0123456789-"
+_HYPHEN = ord("-")
+
 
 def _validate_subdomain(subdomain: str) -> None:
     """
@@ -25,6 +55,19 @@ def _validate_subdomain(subdomain: str) -> None:
     Raises:
         HTTPException: バリデーションエラー（400）
     """
+    # 正常系は bytes 化して 1 回の C レベルスキャンで通す
+    # （非 ASCII 文字は UTF-8 の多バイト列になり translate で検出される）
+    b = subdomain.encode()
+    if (
+        b
+        and len(b) <= 12
+        and b[0] != _HYPHEN
+        and b[-1] != _HYPHEN
+        and not b.translate(None, _ALLOWED_BYTES)
+    ):
+        return
+
+    # 失敗時のみ、どのルールに違反したかを判定してメッセージを返す
     if len(subdomain) > 12:
         raise HTTPException(
             status_code=400,
@@ -35,33 +78,92 @@ def _validate_subdomain(subdomain: str) -> None:
             status_code=400,
             detail="サブドメインは英小文字、数字、ハイフンのみ使用可能です",
         )
-    if subdomain.startswith("-") or subdomain.endswith("-"):
-        raise HTTPException(
-            status_code=400,
-            detail="サブドメインはハイフンで始まる・終わることはできません",
-        )
+    raise HTTPException(
+        status_code=400,
+        detail="サブドメインはハイフンで始まる・終わることはできません",
+    )
+
+
+def _dns_cache_put(subdomain: str, available: bool) -> None:
+    """
+    チェック結果をキャッシュに登録する（サイズ上限付き）。
+
+    上限到達時は期限切れエントリを一掃し、それでも足りなければ
+    最古の登録から落とす（TTL が一定のため挿入順 ≒ 取得時刻順）。
+    """
+    if len(_dns_cache) >= _DNS_CACHE_MAX:
+        now = time.monotonic()
+        for key, (ts, _) in list(_dns_cache.items()):
+            if now - ts >= _DNS_CACHE_TTL:
+                del _dns_cache[key]
+        while len(_dns_cache) >= _DNS_CACHE_MAX:
+            del _dns_cache[next(iter(_dns_cache))]
+    _dns_cache[subdomain] = (time.monotonic(), available)
 
 
-def _check_dns(subdomain: str) -> bool:
+async def _check_dns(subdomain: str) -> bool:
     """
-    Cloudflare DNS に CNAME レコードが存在するか確認する。
+    DNS-over-HTTPS で FQDN が未登録（NXDOMAIN）か確認する。
+
+    既存テナントのレコードはプロキシ有効（proxied）で作成されるため、
+    公開 DNS には CNAME ではなく Cloudflare の A レコードとして見える。
+    そのため「Answer が空」では判定できず、NXDOMAIN（Status 3）のみを
+    利用可能とみなす。
 
     Returns:
-        True: 利用可能（レコードなし）, False: 使用中
+        True: 利用可能（NXDOMAIN）, False: 使用中
+
+    Raises:
+        httpx.HTTPStatusError: DoH が 4xx/5xx を返した場合
     """
-    s = get_settings()
-    cf = Cloudflare(api_token=s.cloudflare_api_token)
-    fqdn = f"{subdomain}.{s.domain}"
+    fqdn = f"{subdomain}.{_settings.domain}"
 
-    records = cf.dns.records.list(
-        zone_id=s.cloudflare_zone_id,
-        name=fqdn,
+    r = await _doh_client.get(
+        "/dns-query", params={"name": fqdn, "type": "A"}
     )
+    r.raise_for_status()
+    data = orjson.loads(r.content)
+
+    return data.get("Status") == 3
+
 
-    for record in records:
-        if record.name == fqdn:
-            return False
-    return True
+async def _check_dns_cached(subdomain: str) -> bool:
+    """
+    _check_dns の TTL キャッシュ + single-flight 付きラッパー。
+
+    同じサブドメインへの同時チェックは最初の 1 件だけが上流へ問い合わせ、
+    残りは同じ Future を待つ。
+
+    Returns:
+        True: 利用可能（レコードなし）, False: 使用中
+    """
+    cached = _dns_cache.get(subdomain)
+    if cached is not None and time.monotonic() - cached[0] < _DNS_CACHE_TTL:
+        return cached[1]
+
+    inflight = _inflight.get(subdomain)
+    if inflight is not None:
+        return await inflight
+
+    fut: asyncio.Future = asyncio.get_running_loop().create_future()
+    _inflight[subdomain] = fut
+    try:
+        available = await _check_dns(subdomain)
+    except Exception as e:
+        fut.set_exception(e)
+        fut.exception()  # 待機者がいない場合の unretrieved 警告を抑止
+        raise
+    else:
+        _dns_cache_put(subdomain, available)
+        fut.set_result(available)
+        return available
+    finally:
+        # 先頭リクエストがキャンセルされた場合（クライアント切断等）、
+        # CancelledError は上の except を素通りする。未解決のまま辞書から
+        # 外すと待機中の後続リクエストが永久に待つため、必ず解決してから外す
+        if not fut.done():
+            fut.cancel()
+        _inflight.pop(subdomain, None)
 
 
 @router.get("/api/check-subdomain")
@@ -76,7 +178,6 @@ async def check_subdomain(
     """
     _validate_subdomain(subdomain)
 
-    loop = asyncio.get_event_loop()
-    available = await loop.run_in_executor(None, _check_dns, subdomain)
+    available = await _check_dns_cached(subdomain)
 
     return {"available": available, "subdomain": subdomain}
@@ -7,10 +7,12 @@ customer.subscription.deleted → クリーンアップ → サンキューメ
 処理はバックグラウンドで実行し、Stripe には即座に 200 を返す。
 """
 
+import asyncio
 import logging
 
 from fastapi import APIRouter, BackgroundTasks, Header, HTTPException, Request
 
+from api.routes.subdomain import _dns_cache
 from api.services import stripe_service, email_service
 from api.services.provision_service import run_provision
 from api.services.cleanup_service import run_cleanup
@@ -41,28 +43,35 @@ async def _handle_checkout_completed(session: dict) -> None:
         duration_days=duration_days,
     )
 
-    # 2. Subscription メタデータ更新
+    # DNS レコードが作成されたので、チェック結果のキャッシュを無効化
+    _dns_cache.pop(subdomain, None)
+
+    # 2. Subscription メタデータ更新 + ウェルカムメール
+    # 互いに独立した処理のため並行実行する（失敗してもログのみ）
+    # stripe SDK は同期 HTTPS 呼び出しのため、イベントループを塞がないよう
+    # スレッドに委譲する
+    tasks = []
     if subscription_id:
-        stripe_service.update_subscription_metadata(
+        tasks.append(asyncio.to_thread(
+            stripe_service.update_subscription_metadata,
             subscription_id=subscription_id,
             metadata={
-                "vmid": result["vmid"],
+                "vmid": str(result["vmid"]),
                 "url": result["url"],
                 "tunnel_id": result["tunnel_id"],
             },
-        )
+        ))
+    tasks.append(email_service.send_welcome_email(
+        email=customer_email,
+        subdomain=subdomain,
+        url=result["url"],
+        oss_type=oss_type,
+        duration_days=duration_days,
+    ))
 
-    # 3. ウェルカムメール（失敗してもログのみ）
-    try:
-        email_service.send_welcome_email(
-            email=customer_email,
-            subdomain=subdomain,
-            url=result["url"],
-            oss_type=oss_type,
-            duration_days=duration_days,
-        )
-    except Exception as e:
-        logger.error("ウェルカムメール送信失敗（続行）: %s", e)
+    for outcome in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            logger.error("チェックアウト後処理失敗（続行）: %s", outcome)
 
 
 async def _handle_subscription_deleted(subscription: dict) -> None:
@@ -92,22 +101,22 @@ async def _handle_subscription_deleted(subscription: dict) -> None:
         )
         return
 
-    # 1. クリーンアップ実行
-    await run_cleanup(
+    # クリーンアップとサンキューメールは独立した処理のため並行実行する
+    # （失敗してもログのみ）
+    tasks = [run_cleanup(
         vmid=int(vmid_str),
         tunnel_id=tunnel_id,
         subdomain=subdomain,
-    )
-
-    # 2. サンキューメール（失敗してもログのみ）
+    )]
     if customer_email:
-        try:
-            email_service.send_thankyou_email(
-                email=customer_email,
-                subdomain=subdomain,
-            )
-        except Exception as e:
-            logger.error("サンキューメール送信失敗（続行）: %s", e)
+        tasks.append(email_service.send_thankyou_email(
+            email=customer_email,
+            subdomain=subdomain,
+        ))
+
+    for outcome in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(outcome, Exception):
+            logger.error("解約後処理失敗（続行）: %s", outcome)
 
 
 @router.post("/webhook/stripe")
@@ -130,6 +139,11 @@ async def stripe_webhook(
         logger.warning("Webhook 署名検証失敗: %s", e)
         raise HTTPException(status_code=400, detail="署名検証失敗")
 
+    # 検証後は raw bytes は不要。BackgroundTasks はレスポンスコンテキストを
+    # 保持し続けるため、大きな invoice.* イベントでも参照を残さないよう
+    # ここで解放する
+    del payload
+
     # イベントタイプ別にバックグラウンド処理を登録
     if event.type == "checkout.session.completed":
         background_tasks.add_task(
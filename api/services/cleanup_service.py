@@ -31,15 +31,12 @@ async def run_cleanup(vmid: int, tunnel_id: str, subdomain: str) -> None:
     )
 
     provisioner = _get_provisioner()
-    loop = asyncio.get_event_loop()
-
-    await loop.run_in_executor(
-        None,
-        lambda: provisioner.cleanup(
-            vmid=vmid,
-            tunnel_id=tunnel_id,
-            subdomain=subdomain,
-        ),
+
+    await asyncio.to_thread(
+        provisioner.cleanup,
+        vmid=vmid,
+        tunnel_id=tunnel_id,
+        subdomain=subdomain,
     )
 
     logger.info("クリーンアップ完了: vmid=%s", vmid)
@@ -1,38 +1,55 @@
 """
 メール送信サービス
 
-SendGrid Web API v3 経由でメールを送信する。
+SendGrid Web API v3 を httpx.AsyncClient で直接呼び出してメールを送信する。
+同期 SDK と違い、送信中にイベントループ（スレッドプール枠）をブロックしない。
 sendgrid_api_key が未設定の場合はスキップする（開発・テスト用）。
 設定済みで送信に失敗した場合は例外を raise する。
 """
 
 import logging
+from functools import cache
 from pathlib import Path
 
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Content
+import httpx
+import orjson
 
 from api.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# 設定はインポート時に一度だけ解決する
+_settings = get_settings()
+
 _TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates"
 
+# テンプレートは実行中に変わらないため、インポート時に一度だけ読み込む
+_TEMPLATES: dict[str, str] = {
+    p.name: p.read_text(encoding="utf-8") for p in _TEMPLATE_DIR.glob("*.html")
+}
+
+
+@cache
+def _get_client() -> httpx.AsyncClient:
+    """SendGrid API 用の共有 AsyncClient を返す（遅延初期化・キャッシュ付き）"""
+    return httpx.AsyncClient(
+        base_url="https://api.sendgrid.com",
+        timeout=10.0,
+        headers={"Authorization": f"Bearer {_settings.sendgrid_api_key}"},
+    )
+
 
 def _load_template(name: str, **kwargs: str) -> str:
-    """テンプレートファイルを読み込み、プレースホルダを置換する。"""
-    path = _TEMPLATE_DIR / name
-    template = path.read_text(encoding="utf-8")
-    return template.format_map(kwargs)
+    """キャッシュ済みテンプレートのプレースホルダを置換する。"""
+    return _TEMPLATES[name].format_map(kwargs)
 
 
 def _is_enabled() -> bool:
     """SendGrid が設定済みかどうか"""
-    s = get_settings()
-    return bool(s.sendgrid_api_key and s.email_from)
+    return bool(_settings.sendgrid_api_key and _settings.email_from)
 
 
-def _send(to_email: str, subject: str, html_body: str) -> None:
+async def _send(to_email: str, subject: str, html_body: str) -> None:
     """
     メールを送信する共通処理。
 
@@ -48,17 +65,19 @@ def _send(to_email: str, subject: str, html_body: str) -> None:
         logger.warning("SendGrid 未設定のためメール送信をスキップ: to=%s", to_email)
         return
 
-    s = get_settings()
-    message = Mail(
-        from_email=s.email_from,
-        to_emails=to_email,
-        subject=subject,
-        html_content=Content("text/html", html_body),
-    )
+    payload = {
+        "personalizations": [{"to": [{"email": to_email}]}],
+        "from": {"email": _settings.email_from},
+        "subject": subject,
+        "content": [{"type": "text/html", "value": html_body}],
+    }
 
     try:
-        client = SendGridAPIClient(s.sendgrid_api_key)
-        response = client.send(message)
+        response = await _get_client().post(
+            "/v3/mail/send",
+            content=orjson.dumps(payload),
+            headers={"content-type": "application/json"},
+        )
     except Exception as e:
         logger.error("メール送信エラー: to=%s, error=%s", to_email, e)
         raise RuntimeError(f"メール送信失敗: {e}") from e
@@ -72,7 +91,7 @@ def _send(to_email: str, subject: str, html_body: str) -> None:
     logger.info("メール送信成功: to=%s, subject=%s", to_email, subject)
 
 
-def send_welcome_email(
+async def send_welcome_email(
     email: str,
     subdomain: str,
     url: str,
@@ -100,10 +119,10 @@ def send_welcome_email(
         subdomain=subdomain,
         duration_days=str(duration_days),
     )
-    _send(email, subject, html_body)
+    await _send(email, subject, html_body)
 
 
-def send_thankyou_email(email: str, subdomain: str) -> None:
+async def send_thankyou_email(email: str, subdomain: str) -> None:
     """
     サンキューメール（解約・cleanup時）を送信する。
 
@@ -119,4 +138,4 @@ def send_thankyou_email(email: str, subdomain: str) -> None:
         "thankyou_email.html",
         subdomain=subdomain,
     )
-    _send(email, subject, html_body)
+    await _send(email, subject, html_body)
@@ -7,8 +7,8 @@ FastAPI から async で呼び出せるようにする。
 
 import asyncio
 import logging
-from functools import lru_cache
-from typing import Any, Dict
+from functools import cache
+from typing import Any, Dict, List
 
 from api.config import Settings, get_settings
 
@@ -19,7 +19,7 @@ from provisioner import TamesukeProvisioner
 logger = logging.getLogger(__name__)
 
 
-@lru_cache()
+@cache
 def _get_provisioner() -> TamesukeProvisioner:
     """Settings から TamesukeProvisioner を生成（キャッシュ付き）"""
     s = get_settings()
@@ -49,7 +49,7 @@ async def run_provision(
     プロビジョニングを非同期で実行する。
 
     provisioner.provision() は同期処理のため、
-    run_in_executor でスレッドプールに委譲する。
+    asyncio.to_thread でスレッドプールに委譲する。
 
     Args:
         customer_email: 顧客メールアドレス
@@ -71,16 +71,13 @@ async def run_provision(
     )
 
     provisioner = _get_provisioner()
-    loop = asyncio.get_event_loop()
-
-    result = await loop.run_in_executor(
-        None,
-        lambda: provisioner.provision(
-            customer_email=customer_email,
-            oss_type=oss_type,
-            subdomain=subdomain,
-            duration_days=duration_days,
-        ),
+
+    result = await asyncio.to_thread(
+        provisioner.provision,
+        customer_email=customer_email,
+        oss_type=oss_type,
+        subdomain=subdomain,
+        duration_days=duration_days,
     )
 
     logger.info(
@@ -88,3 +85,33 @@ async def run_provision(
         result.get("vmid"), result.get("url"),
     )
     return result
+
+
+async def run_provision_many(
+    specs: List[Dict[str, Any]],
+    max_concurrency: int = 8,
+) -> List[Any]:
+    """
+    複数のプロビジョニングを並行実行する。
+
+    provision() は I/O 待ちが支配的なため、同時実行数を
+    Semaphore で制限しつつ並行に流すことでスループットが伸びる
+    （上限は Proxmox / Cloudflare のレート制限で決まる）。
+
+    Args:
+        specs: run_provision のキーワード引数の辞書のリスト
+        max_concurrency: 同時実行数の上限
+
+    Returns:
+        各 spec に対応する結果のリスト（失敗分は例外オブジェクト）
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _bounded(spec: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            return await run_provision(**spec)
+
+    return await asyncio.gather(
+        *(_bounded(spec) for spec in specs),
+        return_exceptions=True,
+    )
@@ -5,7 +5,7 @@ Checkout Session 作成、Webhook 署名検証、Subscription メタデータ更
 """
 
 import logging
-from typing import Any, Dict
+from typing import Dict, Mapping
 
 import stripe
 
@@ -13,20 +13,24 @@ from api.config import get_settings
 
 logger = logging.getLogger(__name__)
 
-# price_id マッピング: (oss_type, duration_days) → Settings のフィールド名
-_PRICE_FIELD_MAP: Dict[tuple, str] = {
-    ("nginx", 7): "stripe_price_nginx_7d",
-    ("nginx", 14): "stripe_price_nginx_14d",
+# 設定はインポート時に一度だけ解決し、API キーもここで設定する
+_settings = get_settings()
+stripe.api_key = _settings.stripe_secret_key
+
+# price_id マッピング: (oss_type, duration_days) → price_id
+# 不変の設定値なのでインポート時に一度だけ解決する
+_PRICE_IDS: Dict[tuple[str, int], str] = {
+    ("nginx", 7): _settings.stripe_price_nginx_7d,
+    ("nginx", 14): _settings.stripe_price_nginx_14d,
 }
 
 
 def _get_price_id(oss_type: str, duration_days: int) -> str:
     """OSSタイプと期間から price_id を取得する。"""
-    key = (oss_type, duration_days)
-    field = _PRICE_FIELD_MAP.get(key)
-    if field is None:
+    try:
+        return _PRICE_IDS[(oss_type, duration_days)]
+    except KeyError:
         raise ValueError(f"未対応の組み合わせ: oss_type={oss_type}, duration_days={duration_days}")
-    return getattr(get_settings(), field)
 
 
 def create_checkout_session(
@@ -52,9 +56,6 @@ def create_checkout_session(
     Returns:
         Stripe Checkout Session オブジェクト
     """
-    settings = get_settings()
-    stripe.api_key = settings.stripe_secret_key
-
     price_id = _get_price_id(oss_type, duration_days)
 
     session = stripe.checkout.Session.create(
@@ -75,8 +76,8 @@ def create_checkout_session(
                 "duration_days": str(duration_days),
             },
         },
-        success_url=f"https://{settings.app_domain}/success.html?session_id={{CHECKOUT_SESSION_ID}}",
-        cancel_url=f"https://{settings.app_domain}/cancel.html",
+        success_url=f"https://{_settings.app_domain}/success.html?session_id={{CHECKOUT_SESSION_ID}}",
+        cancel_url=f"https://{_settings.app_domain}/cancel.html",
     )
 
     logger.info("Checkout Session 作成: id=%s, subdomain=%s", session.id, subdomain)
@@ -98,13 +99,10 @@ def verify_webhook(payload: bytes, sig_header: str) -> stripe.Event:
         stripe.error.SignatureVerificationError: 署名不正
         ValueError: ペイロード不正
     """
-    settings = get_settings()
-    stripe.api_key = settings.stripe_secret_key
-
     event = stripe.Webhook.construct_event(
         payload,
         sig_header,
-        settings.stripe_webhook_secret,
+        _settings.stripe_webhook_secret,
     )
 
     logger.info("Webhook 検証成功: type=%s, id=%s", event.type, event.id)
@@ -113,31 +111,25 @@ def verify_webhook(payload: bytes, sig_header: str) -> stripe.Event:
 
 def update_subscription_metadata(
     subscription_id: str,
-    metadata: Dict[str, Any],
+    metadata: Mapping[str, str],
 ) -> stripe.Subscription:
     """
     Subscription の metadata にプロビジョニング結果を書き込む。
 
     Args:
         subscription_id: Stripe Subscription ID
-        metadata: 追加するメタデータ（vmid, url, tunnel_id 等）
+        metadata: 追加するメタデータ（vmid, url, tunnel_id 等、値は文字列）
 
     Returns:
         更新後の Subscription オブジェクト
     """
-    settings = get_settings()
-    stripe.api_key = settings.stripe_secret_key
-
-    # metadata の値は文字列に変換
-    str_metadata = {k: str(v) for k, v in metadata.items()}
-
     subscription = stripe.Subscription.modify(
         subscription_id,
-        metadata=str_metadata,
+        metadata=metadata,
     )
 
     logger.info(
         "Subscription メタデータ更新: id=%s, keys=%s",
-        subscription_id, list(str_metadata.keys()),
+        subscription_id, list(metadata.keys()),
     )
     return subscription
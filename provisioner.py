@@ -4,20 +4,83 @@ Tamesuke プロビジョニングスクリプト
 File Server方式（WebDAV経由でメタデータ配信）
 """
 
-from typing import Dict, Optional
+from typing import Dict, NamedTuple, Optional
+import logging
+import secrets
+import threading
 import time
 import json
 import os
 import re
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cache
+
+import requests
+from requests.adapters import HTTPAdapter, Retry
 from dotenv import load_dotenv
 
+logger = logging.getLogger('tamesuke.provisioner')
+
+
+class OssSpec(NamedTuple):
+    """OSSタイプごとのプロビジョニング仕様"""
+    template_id: int
+    port: int
+    healthcheck: str = '/'
+    ready_timeout: int = 300
+
+
+# OSSタイプ → 仕様のディスパッチテーブル
+# テンプレートID・ポート・起動確認の情報を1回の辞書引きで取得できる
+# 8010: cloudflare-tunnel-base（ベーステンプレート）
+# 8011: nginx-template（8010 + nginx）
+# 8012: growi-template（8010 + growi）- 将来追加
+OSS_SPECS: Dict[str, OssSpec] = {
+    'nginx': OssSpec(template_id=8011, port=80),
+    # 'growi': OssSpec(template_id=8012, port=3000),  # 将来追加
+    # 'snipeit': OssSpec(template_id=8013, port=80),
+}
+
+
+class PreflightError(Exception):
+    """プロビジョニング前の事前チェック失敗
+
+    まだ何も作成していない段階で検出されたエラー。
+    呼び出し側はロールバック処理なしでそのまま失敗を返してよい。
+    """
+
+
+@cache
+def _get_proxmox(host: str, user: str, password: str):
+    """
+    ProxmoxAPIクライアントをプロセス全体で共有する（認証情報ごとに1つ）
+
+    インスタンスごとに接続を張り直すと認証とTLSハンドシェイクを
+    繰り返すため、同一認証情報のクライアントはキャッシュして使い回す。
+    """
+    from proxmoxer import ProxmoxAPI
+    return ProxmoxAPI(host, user=user, password=password, verify_ssl=False)
+
+
+@cache
+def _get_cloudflare(token: str):
+    """Cloudflareクライアントをプロセス全体で共有する（トークンごとに1つ）"""
+    from cloudflare import Cloudflare
+    return Cloudflare(api_token=token)
+
 
 class TamesukeProvisioner:
     """
     サービスのプロビジョニングを行うクラス
     """
-    
+
+    # 長さ・文字種・ハイフン位置を1回のスキャンで判定するパターン
+    _SUBDOMAIN_RE = re.compile(r'^(?!-)[a-z0-9-]{1,12}(?<!-)\Z')
+
+    # クローン先ストレージと、事前チェックで要求する最小空き容量
+    _STORAGE = 'vm-storage'
+    _MIN_STORAGE_FREE = 8 * 1024 ** 3  # 8 GiB
+
     def __init__(
         self,
         proxmox_host: str,
@@ -60,52 +123,74 @@ class TamesukeProvisioner:
         # API接続オブジェクト（後で初期化）
         self.proxmox = None
         self.cf = None
+
+        # VMID割り当てキャッシュ（初回利用時にクラスタから取得）
+        # 定常状態では Proxmox への問い合わせなしで O(1) で払い出せる
+        # provision() は複数スレッドから並行に呼ばれるため、払い出しは
+        # ロックで直列化する（check-then-add の競合で同一VMIDを二重払い
+        # 出ししないように）
+        self._used_vmids: Optional[set] = None
+        self._vmid_cursor = 9000
+        self._vmid_lock = threading.Lock()
+
+        # テンプレートLXC設定のキャッシュ: template_id → 設定辞書
+        self._template_cache: Dict[int, dict] = {}
+
+        # File Server・ヘルスチェック用のHTTPセッション
+        # keep-aliveで接続を再利用し、ポーリング時のTCP/TLSハンドシェイクを省く
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[502, 503, 504],
+            ),
+        )
+        self._http.mount('http://', adapter)
+        self._http.mount('https://', adapter)
         
-        # OSSタイプとテンプレートIDのマッピング
-        # 8010: cloudflare-tunnel-base（ベーステンプレート）
-        # 8011: nginx-template（8010 + nginx）
-        # 8012: growi-template（8010 + growi）- 将来追加
-        self.template_map = {
-            'nginx': 8011,
-            # 'growi': 8012,  # 将来追加
-            # 'snipeit': 8013,
-        }
-        
-        # OSSタイプとポート番号のマッピング
-        self.port_map = {
-            'nginx': 80,
-            'growi': 3000,
-            'snipeit': 80,
-        }
+        # OSSタイプごとの仕様テーブル
+        self.oss_specs = OSS_SPECS
     
     def connect(self):
         """
         ProxmoxとCloudflareに接続
         """
         try:
-            # Proxmox接続
-            from proxmoxer import ProxmoxAPI
-            self.proxmox = ProxmoxAPI(
+            # Proxmox接続（プロセス共有クライアント）
+            self.proxmox = _get_proxmox(
                 self.proxmox_host,
-                user=self.proxmox_user,
-                password=self.proxmox_password,
-                verify_ssl=False
+                self.proxmox_user,
+                self.proxmox_password,
             )
             version = self.proxmox.version.get()
-            print(f"[OK] Proxmox connected: {version['version']}")
-            
-            # Cloudflare接続
-            from cloudflare import Cloudflare
-            self.cf = Cloudflare(api_token=self.cloudflare_token)
-            print("[OK] Cloudflare connected")
-            
+            logger.info("Proxmox connected: %s", version['version'])
+
+            # Cloudflare接続（プロセス共有クライアント）
+            self.cf = _get_cloudflare(self.cloudflare_token)
+            logger.info("Cloudflare connected")
+
+            # テンプレート設定を事前取得（初回プロビジョニングを速くする）
+            for spec in self.oss_specs.values():
+                try:
+                    self._template_info(spec.template_id)
+                except Exception as e:
+                    logger.warning(
+                        "テンプレート設定の事前取得失敗 (%s): %s",
+                        spec.template_id, e,
+                    )
+
         except ImportError as e:
-            print(f"[ERROR] ライブラリが見つかりません: {e}")
-            print("\n以下のコマンドでインストールしてください:")
-            print("  pip install -r requirements.txt")
+            logger.error(
+                "ライブラリが見つかりません: %s"
+                "（pip install -r requirements.txt でインストールしてください）",
+                e,
+            )
             raise
         except Exception as e:
-            print(f"[ERROR] 接続エラー: {e}")
+            logger.error("接続エラー: %s", e)
             raise
     
     def _validate_subdomain(self, subdomain: str):
@@ -118,23 +203,24 @@ class TamesukeProvisioner:
         Raises:
             ValueError: バリデーションエラー
         """
-        # 長さチェック（12文字以内）
+        # 正常系はプリコンパイル済みパターン1回のスキャンで通す
+        if self._SUBDOMAIN_RE.match(subdomain):
+            return
+
+        # 失敗時のみ、どのルールに違反したかを判定してメッセージを返す
         if len(subdomain) > 12:
             raise ValueError(
                 f"サブドメインは12文字以内にしてください（現在: {len(subdomain)}文字）"
             )
-        
-        # 文字種チェック（英小文字、数字、ハイフンのみ）
-        if not re.match(r'^[a-z0-9-]+$', subdomain):
+
+        if not re.match(r'^[a-z0-9-]+\Z', subdomain):
             raise ValueError(
                 f"サブドメインは英小文字、数字、ハイフンのみ使用可能: {subdomain}"
             )
-        
-        # ハイフン始まり・終わりチェック
-        if subdomain.startswith('-') or subdomain.endswith('-'):
-            raise ValueError(
-                f"サブドメインはハイフンで始まる・終わることはできません: {subdomain}"
-            )
+
+        raise ValueError(
+            f"サブドメインはハイフンで始まる・終わることはできません: {subdomain}"
+        )
     
     def provision(
         self,
@@ -155,149 +241,236 @@ class TamesukeProvisioner:
         Returns:
             プロビジョニング結果の辞書
         """
-        print(f"\n{'='*60}")
-        print(f"プロビジョニング開始")
-        print(f"{'='*60}")
-        print(f"顧客: {customer_email}")
-        print(f"OSS: {oss_type}")
-        print(f"サブドメイン: {subdomain}")
-        print(f"ドメイン: {self.domain}")
-        print(f"期間: {duration_days}日")
-        print(f"{'='*60}\n")
-        
+        logger.info(
+            "プロビジョニング開始: 顧客=%s, OSS=%s, サブドメイン=%s.%s, 期間=%d日",
+            customer_email, oss_type, subdomain, self.domain, duration_days,
+        )
+
+
         # 入力検証
         self._validate_subdomain(subdomain)
-        
-        if oss_type not in self.template_map:
+
+        spec = self.oss_specs.get(oss_type)
+        if spec is None:
             raise ValueError(f"未対応のOSSタイプ: {oss_type}")
         
         # 接続確認
         if self.proxmox is None or self.cf is None:
             self.connect()
         
+        # 事前チェック（読み取りのみ）
+        # ここで失敗すればCloudflare/Proxmoxには何も作成されておらず、
+        # ロールバック処理は一切不要
+        self._preflight(spec)
+
         try:
             # Step 1: VMID割り当て
             vmid = self._get_next_vmid()
-            print(f"1. [OK] VMID割り当て: {vmid}")
-            
-            # Step 2: Cloudflare Tunnel作成
+            logger.info("1. VMID割り当て: %s", vmid)
+
+            # Step 2: Cloudflare Tunnel作成（Tunnel名がVMIDに依存）
             tunnel = self._create_tunnel(vmid, subdomain)
             tunnel_id = tunnel.id
-            print(f"2. [OK] Tunnel作成: {tunnel_id}")
-            
-            # Step 3: Tunnel Token取得
-            tunnel_token = self._get_tunnel_token(tunnel)
-            print(f"3. [OK] Tunnel Token取得")
-            
-            # Step 4: Tunnel設定
-            self._configure_tunnel(tunnel_id, subdomain, oss_type)
-            print(f"4. [OK] Tunnelルーティング設定")
-            
-            # Step 5: DNS登録
-            self._create_dns_record(subdomain, tunnel_id)
-            print(f"5. [OK] DNS登録: {subdomain}.{self.domain}")
-            
-            # Step 6: メタデータJSON作成
-            metadata = self._create_metadata(
-                vmid, customer_email, subdomain, oss_type, tunnel_token
-            )
-            print(f"6. [OK] メタデータJSON作成")
-            
-            # Step 7: File Serverへアップロード
-            self._upload_metadata(subdomain, metadata)
-            print(f"7. [OK] File Serverへアップロード")
-            
-            # Step 8: LXCクローン
-            self._clone_lxc(vmid, oss_type, subdomain)
-            print(f"8. [OK] LXCクローン作成")
-            
-            # Step 9: LXC起動
-            self._start_lxc(vmid)
-            print(f"9. [OK] LXC起動")
-            
+            logger.info("2. Tunnel作成: %s", tunnel_id)
+
+            # create応答自体がTokenを含むため、通常は追加の往復が不要
+            tunnel_token = getattr(tunnel, 'token', None)
+
+            with ThreadPoolExecutor(
+                max_workers=3, thread_name_prefix='provision'
+            ) as pool:
+                # Step 3-5: Token取得・ルーティング設定・DNS登録は
+                # 互いに独立しているため並行実行（各100-500msのAPI往復）
+                token_future = None
+                if tunnel_token is None:
+                    # 古いAPI応答にはtokenが無いため従来どおり取得
+                    token_future = pool.submit(self._get_tunnel_token, tunnel)
+                config_future = pool.submit(
+                    self._configure_tunnel, tunnel_id, subdomain, spec
+                )
+                dns_future = pool.submit(
+                    self._create_dns_record, subdomain, tunnel_id
+                )
+
+                if token_future is not None:
+                    tunnel_token = token_future.result()
+                logger.info("3. Tunnel Token取得")
+                config_future.result()
+                logger.info("4. Tunnelルーティング設定")
+                dns_future.result()
+                logger.info("5. DNS登録: %s.%s", subdomain, self.domain)
+
+                # Step 6: メタデータJSON作成（Tokenに依存）
+                metadata = self._create_metadata(
+                    vmid, customer_email, subdomain, oss_type, tunnel_token
+                )
+                logger.info("6. メタデータJSON作成")
+
+                # Step 7-8: アップロードとLXCクローンも独立しているため並行実行
+                upload_future = pool.submit(
+                    self._upload_metadata, subdomain, metadata
+                )
+                # 起動はアップロード成功を待つ（コンテナが起動時に
+                # メタデータJSONを取得するため）。クローン自体は並行に走る
+                clone_future = pool.submit(
+                    self._clone_lxc, vmid, spec, subdomain,
+                    start_after=upload_future,
+                )
+
+                upload_future.result()
+                logger.info("7. File Serverへアップロード")
+                cloned_vmid = clone_future.result()
+                logger.info("8-9. LXCクローン作成・起動")
+
+                if cloned_vmid != vmid:
+                    # VMID衝突の再試行で変わった場合のみ、メタデータを
+                    # 正しいVMIDで作り直して再アップロード（まれな経路）
+                    vmid = cloned_vmid
+                    metadata = self._create_metadata(
+                        vmid, customer_email, subdomain, oss_type, tunnel_token
+                    )
+                    self._upload_metadata(subdomain, metadata)
+                    logger.info("7'. メタデータ再アップロード (vmid=%s)", vmid)
+
             # Step 10: 初期化完了待機
             url = f"https://{subdomain}.{self.domain}"
-            print(f"10. [WAIT] 初期化完了待機中... (最大5分)")
-            self._wait_for_ready(url, timeout=300)
-            print(f"10. [OK] サービス起動完了")
-            
+            logger.info(
+                "10. 初期化完了待機中... (最大%d秒)", spec.ready_timeout
+            )
+            self._wait_for_ready(url + spec.healthcheck, timeout=spec.ready_timeout)
+            logger.info("10. サービス起動完了")
+
             result = {
                 'vmid': vmid,
                 'tunnel_id': tunnel_id,
                 'url': url,
                 'status': 'active'
             }
-            
-            print(f"\n{'='*60}")
-            print(f"プロビジョニング完了!")
-            print(f"{'='*60}")
-            print(f"URL: {url}")
-            print(f"VMID: {vmid}")
-            print(f"Tunnel ID: {tunnel_id}")
-            print(f"{'='*60}\n")
-            
+
+            logger.info(
+                "プロビジョニング完了: url=%s, vmid=%s, tunnel_id=%s",
+                url, vmid, tunnel_id,
+            )
+
             return result
-            
+
         except Exception as e:
-            print(f"\n[ERROR] エラーが発生しました: {e}")
+            logger.error("プロビジョニング失敗: %s", e)
             # TODO: ロールバック処理
             raise
     
+    def _preflight(self, spec: OssSpec):
+        """
+        プロビジョニング前の読み取り専用チェック
+
+        Tunnel作成・DNS登録より前に、クローンが失敗する要因
+        （テンプレート不在・ストレージ容量不足）を検出する。
+        失敗はPreflightErrorとして即座に返り、作成済みリソースの
+        後始末（Cloudflare API往復）が発生しない。
+
+        Args:
+            spec: OSS仕様
+
+        Raises:
+            PreflightError: テンプレート不在またはストレージ容量不足
+        """
+        # テンプレート存在確認（設定GETはメモ化済みのため2回目以降は無料）
+        try:
+            self._template_info(spec.template_id)
+        except Exception as e:
+            raise PreflightError(
+                f"テンプレート {spec.template_id} が見つかりません: {e}"
+            )
+
+        # ストレージ空き容量確認
+        status = self.proxmox.nodes(self.node).storage(self._STORAGE).status.get()
+        avail = status.get('avail', 0)
+        if avail < self._MIN_STORAGE_FREE:
+            raise PreflightError(
+                f"ストレージ {self._STORAGE} の空き容量不足: "
+                f"{avail / 1024 ** 3:.1f} GiB < "
+                f"{self._MIN_STORAGE_FREE / 1024 ** 3:.0f} GiB"
+            )
+
+    def _template_info(self, template_id: int) -> dict:
+        """
+        テンプレートLXCの設定を取得（インスタンス内にメモ化）
+
+        Proxmoxの設定GETは遅いため、同一テンプレートへの繰り返し参照は
+        キャッシュから返す。
+
+        Args:
+            template_id: テンプレートのVMID
+
+        Returns:
+            LXC設定の辞書
+        """
+        info = self._template_cache.get(template_id)
+        if info is None:
+            info = self.proxmox.nodes(self.node).lxc(template_id).config.get()
+            self._template_cache[template_id] = info
+        return info
+
+    def _refresh_used_vmids(self):
+        """
+        クラスタ全体の使用中VMIDを取得してキャッシュを更新
+        """
+        resources = self.proxmox.cluster.resources.get(type='vm')
+        self._used_vmids = {resource['vmid'] for resource in resources}
+
     def _get_next_vmid(self) -> int:
         """
         利用可能なVMIDを取得（9000～9999の範囲）
-        
+
+        使用中VMIDはインスタンス内にキャッシュし、カーソルを進めながら
+        払い出す。カーソルが末尾に達したらクラスタから再取得して
+        先頭からやり直す（他プロセスが解放したVMIDを拾うため）。
+
         Returns:
             利用可能なVMID
         """
-        resources = self.proxmox.cluster.resources.get(type='vm')
-        used_vmids = {resource['vmid'] for resource in resources}
-        
-        for vmid in range(9000, 10000):
-            if vmid not in used_vmids:
-                return vmid
-        
+        with self._vmid_lock:
+            if self._used_vmids is None:
+                self._refresh_used_vmids()
+
+            for refreshed in (False, True):
+                if refreshed:
+                    # カーソルが尽きた場合のみ再スキャン
+                    self._refresh_used_vmids()
+                    self._vmid_cursor = 9000
+
+                for vmid in range(self._vmid_cursor, 10000):
+                    if vmid not in self._used_vmids:
+                        self._used_vmids.add(vmid)
+                        self._vmid_cursor = vmid + 1
+                        return vmid
+
         raise Exception("利用可能なVMIDがありません（9000-9999がすべて使用中）")
     
     def _create_tunnel(self, vmid: int, subdomain: str):
         """
         Cloudflare Tunnelを作成
-        既存の同名Tunnelがあれば削除してから作成
-        
+
+        Tunnel名にランダムサフィックスを含めて衝突を事実上不可能にし、
+        既存チェック（LIST + DELETE）の往復を省く。
+
         Args:
             vmid: VMID
             subdomain: サブドメイン
-        
+
         Returns:
             Tunnelオブジェクト
         """
-        import secrets
-        
-        tunnel_name = f"service-{vmid}-{subdomain}"
-        
-        # 既存Tunnelをチェック
-        existing_tunnels = self.cf.zero_trust.tunnels.cloudflared.list(
-            account_id=self.cloudflare_account_id,
-            name=tunnel_name
-        )
-        
-        # 同名のTunnelがあれば削除
-        for tunnel in existing_tunnels:
-            if tunnel.name == tunnel_name:
-                print(f"   - 既存Tunnel削除: {tunnel.id}")
-                self.cf.zero_trust.tunnels.cloudflared.delete(
-                    tunnel.id,
-                    account_id=self.cloudflare_account_id
-                )
-        
-        # 新しいTunnel作成
+        # サフィックスにより同名衝突が起きないため、事前のLIST/DELETEは不要
+        tunnel_name = f"service-{vmid}-{subdomain}-{secrets.token_hex(3)}"
+
         tunnel_secret = secrets.token_bytes(32).hex()
         tunnel = self.cf.zero_trust.tunnels.cloudflared.create(
             account_id=self.cloudflare_account_id,
             name=tunnel_name,
             tunnel_secret=tunnel_secret
         )
-        
+
         return tunnel
     
     def _get_tunnel_token(self, tunnel) -> str:
@@ -317,16 +490,16 @@ class TamesukeProvisioner:
         
         return token
     
-    def _configure_tunnel(self, tunnel_id: str, subdomain: str, oss_type: str):
+    def _configure_tunnel(self, tunnel_id: str, subdomain: str, spec: OssSpec):
         """
         Tunnelのルーティング設定
-        
+
         Args:
             tunnel_id: Tunnel ID
             subdomain: サブドメイン
-            oss_type: OSSタイプ
+            spec: OSS仕様
         """
-        port = self.port_map[oss_type]
+        port = spec.port
         hostname = f"{subdomain}.{self.domain}"
         
         config = {
@@ -347,31 +520,38 @@ class TamesukeProvisioner:
             config=config
         )
     
+    # Cloudflare APIの「同一レコードが既に存在する」エラーコード
+    _RECORD_EXISTS_CODES = frozenset({81053, 81057})
+
+    @classmethod
+    def _is_record_exists_error(cls, e: Exception) -> bool:
+        """
+        Cloudflare APIエラーが「レコードは既に存在する」かを判定
+
+        SDKの例外が公開するエラーコードを優先し、コードを持たない
+        応答のみメッセージ文字列で判定する。
+        """
+        for err in getattr(e, 'errors', None) or ():
+            if getattr(err, 'code', None) in cls._RECORD_EXISTS_CODES:
+                return True
+        return 'already exists' in str(e)
+
     def _create_dns_record(self, subdomain: str, tunnel_id: str):
         """
         Cloudflare DNSレコードを作成
-        既存の同名レコードがあれば削除してから作成
-        
+
+        通常はレコードが存在しないため、まずCREATEを1往復で試みる。
+        「既に存在する」エラーの場合のみLIST + UPDATEにフォールバックする。
+
         Args:
             subdomain: サブドメイン
             tunnel_id: Tunnel ID
+
+        Raises:
+            Exception: レコードを作成も更新もできなかった場合
         """
-        # 既存DNSレコードをチェック
-        existing_records = self.cf.dns.records.list(
-            zone_id=self.cloudflare_zone_id,
-            name=f"{subdomain}.{self.domain}"
-        )
-        
-        # 同名のレコードがあれば削除
-        for record in existing_records:
-            if record.name == f"{subdomain}.{self.domain}":
-                print(f"   - 既存DNSレコード削除: {record.id}")
-                self.cf.dns.records.delete(
-                    record.id,
-                    zone_id=self.cloudflare_zone_id
-                )
-        
-        # 新しいDNSレコード作成
+        fqdn = f"{subdomain}.{self.domain}"
+
         dns_record = {
             'type': 'CNAME',
             'name': subdomain,
@@ -379,7 +559,38 @@ class TamesukeProvisioner:
             'ttl': 1,  # Automatic
             'proxied': True
         }
-        
+
+        try:
+            self.cf.dns.records.create(
+                zone_id=self.cloudflare_zone_id,
+                **dns_record
+            )
+            return
+        except Exception as e:
+            if not self._is_record_exists_error(e):
+                raise
+
+        # 既存レコードがある場合のみ更新にフォールバック
+        existing_records = self.cf.dns.records.list(
+            zone_id=self.cloudflare_zone_id,
+            name=fqdn
+        )
+        for record in existing_records:
+            if record.name == fqdn:
+                logger.info("既存DNSレコード更新: %s", record.id)
+                self.cf.dns.records.update(
+                    record.id,
+                    zone_id=self.cloudflare_zone_id,
+                    **dns_record
+                )
+                return
+
+        # 「既に存在する」と言われたのにLISTに出てこない場合（並行削除など）。
+        # レコード未作成のまま成功扱いにしないよう、作成を再試行し、
+        # それでも失敗するならそのまま例外を上げる
+        logger.warning(
+            "既存DNSレコードが見つからないため作成を再試行: %s", fqdn
+        )
         self.cf.dns.records.create(
             zone_id=self.cloudflare_zone_id,
             **dns_record
@@ -414,7 +625,8 @@ class TamesukeProvisioner:
             'oss_type': oss_type,
             'url': f'https://{subdomain}.{self.domain}',
             'tunnel_token': tunnel_token,
-            'created_at': datetime.utcnow().isoformat() + 'Z'
+            # datetime生成 + isoformat + 文字列連結より軽い直接フォーマット
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
         }
         
         return metadata
@@ -427,15 +639,20 @@ class TamesukeProvisioner:
             subdomain: サブドメイン名
             metadata: メタデータ辞書
         """
-        import requests
-
         url = f'http://{self.fileserver_host}:{self.fileserver_port}/upload/metadata-{subdomain}.json'
-        metadata_json = json.dumps(metadata, indent=2)
-        
-        response = requests.put(
+
+        # インデントなし・UTF-8エンコード済みで送る（ペイロード最小化 + 再エンコード回避）
+        payload = json.dumps(
+            metadata, separators=(',', ':'), ensure_ascii=False
+        ).encode('utf-8')
+
+        response = self._http.put(
             url,
-            data=metadata_json,
-            headers={'Content-Type': 'application/json'},
+            data=payload,
+            headers={
+                'Content-Type': 'application/json',
+                'Content-Length': str(len(payload)),
+            },
             timeout=10
         )
         
@@ -458,6 +675,9 @@ class TamesukeProvisioner:
         """
         start_time = time.time()
 
+        # 速いタスクは短い間隔で拾い、長いタスクはポーリング負荷を抑える
+        delay = 0.25
+
         while time.time() - start_time < timeout:
             task_status = self.proxmox.nodes(self.node).tasks(upid).status.get()
 
@@ -470,73 +690,122 @@ class TamesukeProvisioner:
                     )
 
             elapsed = int(time.time() - start_time)
-            print(f"   クローン中... {elapsed}秒経過", end='\r')
-            time.sleep(2)
+            logger.debug("タスク実行中... %d秒経過", elapsed)
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
 
         raise Exception(f"タスクタイムアウト: {timeout}秒以内に完了しませんでした")
 
-    def _clone_lxc(self, vmid: int, oss_type: str, subdomain: str):
+    # Proxmoxが返すVMID衝突エラーの識別文字列
+    _VMID_CONFLICT_MARKERS = ('already exist', 'already in use')
+    _CLONE_MAX_ATTEMPTS = 3
+
+    def _clone_lxc(self, vmid: int, spec: OssSpec, subdomain: str,
+                   start: bool = True,
+                   start_after: Optional[Future] = None) -> int:
         """
-        テンプレートからLXCをクローン
+        テンプレートからLXCをクローンし、完了次第そのまま起動する
+
+        クローン完了を検知した同じ場所で起動要求まで出すことで、
+        呼び出し元（並行実行中の他ステップ）の完了を待たずに
+        起動を最速で開始できる。
+
+        ただしコンテナは起動時に tamesuke-init.service がメタデータJSONを
+        一度だけ取得するため、起動はメタデータアップロードの完了後で
+        なければならない。start_after にアップロードのFutureを渡すと、
+        その成功を待ってから起動する。
+
+        キャッシュ上は空きでも、他プロセスが先に同じVMIDを使う可能性が
+        あるため、VMID衝突エラーは新しいVMIDを払い出して再試行する
+        （衝突したVMIDは使用中キャッシュに残るため再抽選されない）。
 
         Args:
             vmid: 新しいVMID
-            oss_type: OSSタイプ
+            spec: OSS仕様
             subdomain: サブドメイン（ホスト名として使用）
+            start: クローン完了後に起動するかどうか
+            start_after: 起動前に成功を待つFuture（失敗時は起動しない）
+
+        Returns:
+            実際にクローンされたVMID（衝突再試行で引数と異なる場合がある）
         """
-        template_id = self.template_map[oss_type]
+        template_id = spec.template_id
 
         # ホスト名 = サブドメイン
         hostname = subdomain
 
-        # clone.post()はタスクID（UPID）を返す
-        upid = self.proxmox.nodes(self.node).lxc(template_id).clone.post(
-            newid=vmid,
-            hostname=hostname,
-            full=1,  # フルクローン
-            storage='vm-storage'  # ZFS保護ストレージ
-        )
+        for attempt in range(self._CLONE_MAX_ATTEMPTS):
+            try:
+                # clone.post()はタスクID（UPID）を返す
+                upid = self.proxmox.nodes(self.node).lxc(template_id).clone.post(
+                    newid=vmid,
+                    hostname=hostname,
+                    full=1,  # フルクローン
+                    storage=self._STORAGE  # ZFS保護ストレージ
+                )
 
-        # タスク完了を待機
-        self._wait_for_task(upid)
-    
-    def _start_lxc(self, vmid: int):
-        """
-        LXCを起動
+                # タスク完了を待機
+                self._wait_for_task(upid)
+                break
+            except Exception as e:
+                message = str(e)
+                if not any(m in message for m in self._VMID_CONFLICT_MARKERS):
+                    raise
+                if attempt == self._CLONE_MAX_ATTEMPTS - 1:
+                    raise
+                logger.warning(
+                    "VMID %d は他プロセスが使用中。再割り当てして再試行: %s",
+                    vmid, e,
+                )
+                vmid = self._get_next_vmid()
 
-        Args:
-            vmid: VMID
-        """
-        # start.post()はタスクID（UPID）を返す
-        upid = self.proxmox.nodes(self.node).lxc(vmid).status.start.post()
+        if start:
+            if start_after is not None:
+                # アップロード失敗時はここで例外が上がり、起動しない
+                # （設定なしで起動したコンテナは readiness 待ちを丸ごと
+                # 浪費して失敗するため、起動しない方が安全）
+                start_after.result()
+
+            # 起動もタスクID（UPID）を返す
+            upid = self.proxmox.nodes(self.node).lxc(vmid).status.start.post()
+            self._wait_for_task(upid, timeout=60)
 
-        # タスク完了を待機
-        self._wait_for_task(upid, timeout=60)
+        return vmid
     
     def _wait_for_ready(self, url: str, timeout: int = 300):
         """
         サービスが起動するまで待機
-        
+
+        HEADリクエスト + 指数バックオフでポーリングする。
+        起動直後は短い間隔で検知し、長引く場合は試行回数を抑える。
+
         Args:
             url: チェックするURL
             timeout: タイムアウト秒数
         """
-        import requests
-        
         start_time = time.time()
-        
+        delay = 1.0
+
         while time.time() - start_time < timeout:
             try:
-                response = requests.get(url, timeout=5, verify=False)
+                # Cloudflare経由の正規証明書なので検証を有効にする
+                # （検証済みセッションはTLSセッション再開も効く）
+                response = self._http.head(
+                    url, timeout=5, allow_redirects=True
+                )
+                if response.status_code == 405:
+                    # HEAD未対応のサービスのみGETにフォールバック
+                    response = self._http.get(url, timeout=5)
                 if response.status_code < 500:
                     return True
             except requests.exceptions.RequestException:
                 pass
-            
-            time.sleep(10)
+
+            time.sleep(delay)
+            delay = min(delay * 1.5, 15.0)
             elapsed = int(time.time() - start_time)
-            print(f"   {elapsed}秒経過...", end='\r')
-        
+            logger.debug("起動待機中... %d秒経過", elapsed)
+
         raise Exception(f"タイムアウト: {timeout}秒以内にサービスが起動しませんでした")
 
     def cleanup(self, vmid: int, tunnel_id: str, subdomain: str) -> None:
@@ -550,15 +819,10 @@ class TamesukeProvisioner:
             tunnel_id: 削除対象の Cloudflare Tunnel ID
             subdomain: 削除対象のサブドメイン
         """
-        import requests
-
-        print(f"\n{'='*60}")
-        print(f"クリーンアップ開始")
-        print(f"{'='*60}")
-        print(f"VMID: {vmid}")
-        print(f"Tunnel ID: {tunnel_id}")
-        print(f"サブドメイン: {subdomain}")
-        print(f"{'='*60}\n")
+        logger.info(
+            "クリーンアップ開始: vmid=%s, tunnel_id=%s, subdomain=%s",
+            vmid, tunnel_id, subdomain,
+        )
 
         # 接続確認
         if self.proxmox is None or self.cf is None:
@@ -570,76 +834,82 @@ class TamesukeProvisioner:
         try:
             upid = self.proxmox.nodes(self.node).lxc(vmid).status.stop.post()
             self._wait_for_task(upid, timeout=60)
-            print(f"1. [OK] LXC停止: {vmid}")
+            logger.info("1. LXC停止: %s", vmid)
         except Exception as e:
-            msg = f"1. [WARN] LXC停止失敗: {e}"
-            print(msg)
-            errors.append(msg)
+            logger.warning("1. LXC停止失敗: %s", e)
+            errors.append(f"LXC停止失敗: {e}")
 
         # Step 2: LXC削除
         try:
             upid = self.proxmox.nodes(self.node).lxc(vmid).delete()
             self._wait_for_task(upid, timeout=120)
-            print(f"2. [OK] LXC削除: {vmid}")
-        except Exception as e:
-            msg = f"2. [WARN] LXC削除失敗: {e}"
-            print(msg)
-            errors.append(msg)
-
-        # Step 3: Cloudflare Tunnel削除
-        try:
-            self.cf.zero_trust.tunnels.cloudflared.delete(
-                tunnel_id,
-                account_id=self.cloudflare_account_id,
-            )
-            print(f"3. [OK] Tunnel削除: {tunnel_id}")
+            # 削除したVMIDは再利用可能になるためキャッシュから外す
+            if self._used_vmids is not None:
+                self._used_vmids.discard(vmid)
+            logger.info("2. LXC削除: %s", vmid)
         except Exception as e:
-            msg = f"3. [WARN] Tunnel削除失敗: {e}"
-            print(msg)
-            errors.append(msg)
+            logger.warning("2. LXC削除失敗: %s", e)
+            errors.append(f"LXC削除失敗: {e}")
 
-        # Step 4: DNS CNAMEレコード削除
-        try:
-            fqdn = f"{subdomain}.{self.domain}"
-            existing_records = self.cf.dns.records.list(
-                zone_id=self.cloudflare_zone_id,
-                name=fqdn,
-            )
-            for record in existing_records:
-                if record.name == fqdn:
-                    self.cf.dns.records.delete(
-                        record.id,
-                        zone_id=self.cloudflare_zone_id,
-                    )
-            print(f"4. [OK] DNSレコード削除: {fqdn}")
-        except Exception as e:
-            msg = f"4. [WARN] DNSレコード削除失敗: {e}"
-            print(msg)
-            errors.append(msg)
+        # Step 3-5: Tunnel削除・DNS削除・メタデータ削除は互いに独立の
+        # ため並行実行する（失敗は個別に記録し、他を止めない）
+        def _delete_tunnel():
+            try:
+                self.cf.zero_trust.tunnels.cloudflared.delete(
+                    tunnel_id,
+                    account_id=self.cloudflare_account_id,
+                )
+                logger.info("3. Tunnel削除: %s", tunnel_id)
+            except Exception as e:
+                logger.warning("3. Tunnel削除失敗: %s", e)
+                errors.append(f"Tunnel削除失敗: {e}")
 
-        # Step 5: メタデータファイル削除
-        try:
-            url = (
-                f"http://{self.fileserver_host}:{self.fileserver_port}"
-                f"/upload/metadata-{subdomain}.json"
-            )
-            response = requests.delete(url, timeout=10)
-            if response.status_code not in [200, 204, 404]:
-                raise Exception(f"HTTP {response.status_code}")
-            print(f"5. [OK] メタデータ削除: metadata-{subdomain}.json")
-        except Exception as e:
-            msg = f"5. [WARN] メタデータ削除失敗: {e}"
-            print(msg)
-            errors.append(msg)
+        def _delete_dns():
+            try:
+                fqdn = f"{subdomain}.{self.domain}"
+                existing_records = self.cf.dns.records.list(
+                    zone_id=self.cloudflare_zone_id,
+                    name=fqdn,
+                )
+                for record in existing_records:
+                    if record.name == fqdn:
+                        self.cf.dns.records.delete(
+                            record.id,
+                            zone_id=self.cloudflare_zone_id,
+                        )
+                logger.info("4. DNSレコード削除: %s", fqdn)
+            except Exception as e:
+                logger.warning("4. DNSレコード削除失敗: %s", e)
+                errors.append(f"DNSレコード削除失敗: {e}")
+
+        def _delete_metadata():
+            try:
+                url = (
+                    f"http://{self.fileserver_host}:{self.fileserver_port}"
+                    f"/upload/metadata-{subdomain}.json"
+                )
+                response = self._http.delete(url, timeout=10)
+                if response.status_code not in [200, 204, 404]:
+                    raise Exception(f"HTTP {response.status_code}")
+                logger.info("5. メタデータ削除: metadata-%s.json", subdomain)
+            except Exception as e:
+                logger.warning("5. メタデータ削除失敗: %s", e)
+                errors.append(f"メタデータ削除失敗: {e}")
+
+        with ThreadPoolExecutor(
+            max_workers=3, thread_name_prefix='cleanup'
+        ) as pool:
+            pool.submit(_delete_tunnel)
+            pool.submit(_delete_dns)
+            pool.submit(_delete_metadata)
 
-        print(f"\n{'='*60}")
         if errors:
-            print(f"クリーンアップ完了（警告あり: {len(errors)}件）")
-            for err in errors:
-                print(f"  {err}")
+            logger.warning(
+                "クリーンアップ完了（警告あり: %d件）: %s",
+                len(errors), "; ".join(errors),
+            )
         else:
-            print(f"クリーンアップ完了!")
-        print(f"{'='*60}\n")
+            logger.info("クリーンアップ完了: vmid=%s", vmid)
 
 
 # ========================================
@@ -651,6 +921,12 @@ if __name__ == '__main__':
     使用例：環境変数から読み込んで実行
     """
     
+    # 単体実行時のログ出力設定
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
     # .envファイルを読み込む
     load_dotenv()
     